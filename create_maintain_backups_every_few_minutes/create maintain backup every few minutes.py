@@ -1,34 +1,229 @@
 import os
 import shutil
 import time
+import ctypes
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    # pip install watchdog → backups are triggered by file changes instead of a timer
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+try:
+    # pip install zstandard → needed only for the archive backups (ARCHIVE_BACKUPS)
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
 # === Configuration ===
 SOURCE_DIR = r"C:\MyFolder"   # Folder you want to back up
 BACKUP_DIR = r"C:\backups_of_MyFolder"  # Folder where backups will be stored
-BACKUP_INTERVAL_MINUTES = 5              # Backup interval
+BACKUP_INTERVAL_MINUTES = 5              # Backup interval (used only when watchdog is not installed)
+BACKUP_DEBOUNCE_SECONDS = 10             # Wait after a change so a burst of saves ends up in one backup
+BACKUP_PREFIX = "1771_backup_"           # Name prefix of the backup folders
+COPY_WORKERS = 8                         # Files copied at the same time (overlaps the per-file disk latency)
+ARCHIVE_BACKUPS = False                  # True = every backup is a single .tar.zst file (for slow USB/NAS backup drives)
+ARCHIVE_LEVEL = 3                        # zstd compression level of the archives (3 = fast, still 2-4x smaller for text)
 
 # === Ensure backup directory exists ===
 os.makedirs(BACKUP_DIR, exist_ok=True)
 
+def find_last_backup():
+    """Returns the path of the most recent backup inside BACKUP_DIR, or None if there is none."""
+    # The timestamp in the folder name sorts chronologically
+    backups = sorted(
+        name for name in os.listdir(BACKUP_DIR)
+        if name.startswith(BACKUP_PREFIX) and os.path.isdir(os.path.join(BACKUP_DIR, name))
+    )
+    return os.path.join(BACKUP_DIR, backups[-1]) if backups else None
+
+# The backup the next one is compared against (picked up again after a restart)
+LAST_BACKUP = find_last_backup()
+
+def is_unchanged(src_file, prev_file):
+    """True if prev_file (from the previous backup) has the same size and modification time as src_file."""
+    try:
+        src_stat = os.stat(src_file)
+        prev_stat = os.stat(prev_file)
+    except OSError:
+        return False
+    return src_stat.st_size == prev_stat.st_size and src_stat.st_mtime_ns == prev_stat.st_mtime_ns
+
+def copy_file_range_all(src_file, dest_file):
+    """Copies the data of src_file into dest_file with the Linux copy_file_range() system call.
+
+    The data never passes through user space, and on btrfs/XFS the filesystem can even
+    share (reflink) the blocks instead of copying them; NFS/SMB servers copy server-side."""
+    with open(src_file, "rb") as src, open(dest_file, "wb") as dest:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dest.fileno(), min(remaining, 1 << 30))
+            if copied == 0:
+                # Nothing copied before the end: some filesystems (pseudo/FUSE files) don't support it,
+                # the file must not be left truncated → copy_file falls back to a regular copy
+                raise OSError(f"copy_file_range stopped with {remaining} bytes left to copy: {src_file}")
+            remaining -= copied
+
+def copy_file(src_file, dest_file):
+    """Copies one file together with its timestamps, letting the OS kernel move the data."""
+    if os.name == "nt":
+        # CopyFileExW copies inside the kernel (server-side on network shares) and keeps the timestamps
+        if not ctypes.windll.kernel32.CopyFileExW(src_file, dest_file, None, None, None, 0):
+            raise ctypes.WinError()
+        return
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            copy_file_range_all(src_file, dest_file)
+            shutil.copystat(src_file, dest_file)
+            return
+        except OSError:
+            # Not supported by this kernel/filesystem pair (or incomplete) → regular copy below, rewrites dest_file
+            pass
+
+    # shutil.copy2 already uses the zero-copy sendfile() (Linux) / fcopyfile() (macOS) kernel paths
+    shutil.copy2(src_file, dest_file)
+
+def backup_file(src_file, dest_file, prev_file):
+    """Backs up one file: hard link to the previous backup if unchanged, copy otherwise.
+    Returns True if the file was hard-linked."""
+    if prev_file and is_unchanged(src_file, prev_file):
+        try:
+            # Same data as in the previous backup: only a new directory entry is written
+            os.link(prev_file, dest_file)
+            return True
+        except OSError:
+            # Hard links not supported (e.g. FAT/exFAT drive) → fall back to a copy
+            pass
+    copy_file(src_file, dest_file)
+    return False
+
+def scan_tree(src_dir, dest_dir, prev_dir):
+    """Recreates the folder structure of src_dir inside dest_dir and
+    yields (src_file, dest_file, prev_file) for every file to back up."""
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        os.makedirs(os.path.join(dest_dir, rel_dir), exist_ok=True)
+        with os.scandir(os.path.join(src_dir, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir():
+                    pending.append(rel_path)
+                else:
+                    prev_file = os.path.join(prev_dir, rel_path) if prev_dir else None
+                    yield entry.path, os.path.join(dest_dir, rel_path), prev_file
+
+def copy_incremental(src_dir, dest_dir, prev_dir):
+    """Copies src_dir into dest_dir like shutil.copytree, but the files that didn't change
+    since the previous backup (prev_dir) are hard-linked to it instead of being copied again.
+    The files are handled by COPY_WORKERS threads, so many small files don't wait on each other.
+
+    Returns (copied, linked): the number of copied and hard-linked files."""
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+        linked_flags = list(executor.map(lambda job: backup_file(*job), scan_tree(src_dir, dest_dir, prev_dir)))
+    linked = sum(linked_flags)
+    return len(linked_flags) - linked, linked
+
+def create_archive(dest_path):
+    """Streams SOURCE_DIR into a single zstd-compressed tar file (dest_path + ".tar.zst").
+
+    The backup drive only sees one large sequential write instead of a create/write/close per file,
+    and the compressed data is smaller too. Returns the path of the archive."""
+    archive_path = dest_path + ".tar.zst"
+    compressor = zstd.ZstdCompressor(level=ARCHIVE_LEVEL, threads=-1)  # -1 = one compression thread per CPU core
+    with open(archive_path, "wb") as f, \
+            compressor.stream_writer(f) as zf, \
+            tarfile.open(mode="w|", fileobj=zf) as tar:
+        tar.add(SOURCE_DIR, arcname=os.path.basename(os.path.normpath(SOURCE_DIR)))
+    return archive_path
+
 def create_backup():
-    """Creates a timestamped copy of SOURCE_DIR inside BACKUP_DIR."""
+    """Creates a timestamped copy of SOURCE_DIR inside BACKUP_DIR.
+
+    Unchanged files are hard links to the previous backup, so every backup still looks like
+    a full copy but only the modified files take new disk space and copy time.
+    (Never edit files inside a backup folder: a hard-linked file is shared by several backups.)
+    With ARCHIVE_BACKUPS the backup is a single .tar.zst archive instead (see create_archive)."""
+    global LAST_BACKUP
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    backup_name = f"1771_backup_{timestamp}"
+    backup_name = f"{BACKUP_PREFIX}{timestamp}"
     dest_path = os.path.join(BACKUP_DIR, backup_name)
 
+    if ARCHIVE_BACKUPS and zstd is not None:
+        print(f"[{datetime.now()}] Creating backup archive → {dest_path}.tar.zst")
+        try:
+            create_archive(dest_path)
+            print(f"[{datetime.now()}] ✅ Backup archive complete.")
+        except Exception as e:
+            print(f"[{datetime.now()}] ❌ Error: {e}")
+        return
+
     print(f"[{datetime.now()}] Creating backup → {dest_path}")
     try:
-        shutil.copytree(SOURCE_DIR, dest_path)
-        print(f"[{datetime.now()}] ✅ Backup complete.")
+        copied, linked = copy_incremental(SOURCE_DIR, dest_path, LAST_BACKUP)
+        LAST_BACKUP = dest_path
+        print(f"[{datetime.now()}] ✅ Backup complete ({copied} copied, {linked} unchanged).")
     except Exception as e:
         print(f"[{datetime.now()}] ❌ Error: {e}")
 
-def main():
-    print(f"Starting automatic backup every {BACKUP_INTERVAL_MINUTES} minutes...")
-    while True:
+class SourceChangeHandler(FileSystemEventHandler):
+    """Sets the `changed` event whenever something inside SOURCE_DIR is created, modified, moved or deleted."""
+
+    def __init__(self, changed):
+        super().__init__()
+        self.changed = changed
+
+    def _on_change(self, event):
+        # Ignore our own writes in case BACKUP_DIR lives inside SOURCE_DIR
+        backup_root = os.path.join(os.path.abspath(BACKUP_DIR), "")
+        if os.path.join(os.path.abspath(event.src_path), "").startswith(backup_root):
+            return
+        self.changed.set()
+
+    on_created = _on_change
+    on_modified = _on_change
+    on_moved = _on_change
+    on_deleted = _on_change
+
+def watch_and_backup():
+    """Creates a backup only after SOURCE_DIR has changed (nothing is done while the folder is idle)."""
+    changed = threading.Event()
+    observer = Observer()
+    observer.schedule(SourceChangeHandler(changed), SOURCE_DIR, recursive=True)
+    observer.start()
+    try:
         create_backup()
-        time.sleep(BACKUP_INTERVAL_MINUTES * 60)
+        while True:
+            # Short timeouts keep Ctrl+C responsive on Windows
+            if not changed.wait(timeout=1):
+                continue
+            # Debounce: let the burst of saves finish, then back them up together
+            time.sleep(BACKUP_DEBOUNCE_SECONDS)
+            changed.clear()
+            create_backup()
+    finally:
+        observer.stop()
+        observer.join()
+
+def main():
+    if ARCHIVE_BACKUPS and zstd is None:
+        print("(zstandard is not installed, 'pip install zstandard' → creating folder backups instead of archives)")
+    if Observer is not None:
+        print(f"Watching {SOURCE_DIR} and creating a backup after every change...")
+        watch_and_backup()
+    else:
+        print(f"Starting automatic backup every {BACKUP_INTERVAL_MINUTES} minutes...")
+        print("(install watchdog with 'pip install watchdog' to back up only when files change)")
+        while True:
+            create_backup()
+            time.sleep(BACKUP_INTERVAL_MINUTES * 60)
 
 if __name__ == "__main__":
     main()
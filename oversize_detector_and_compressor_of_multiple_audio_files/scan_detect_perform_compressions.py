@@ -1,12 +1,47 @@
 import os
+import sys
+import errno
 import math
 import datetime
+import functools
+import logging
+import logging.handlers
 import shutil
+import sqlite3
+import stat
 import subprocess
-from mutagen import File as AudioFile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    #pip install mutagen-rs → Rust-based drop-in replacement of mutagen, reads the metadata much faster
+    from mutagen_rs import File as AudioFile, MP3, FLAC, OggVorbis, MP4
+    AAC = WAVE = None  # not provided by mutagen-rs, these files go through AudioFile
+except ImportError:
+    from mutagen import File as AudioFile
+    from mutagen.mp3 import MP3
+    from mutagen.flac import FLAC
+    from mutagen.oggvorbis import OggVorbis
+    from mutagen.mp4 import MP4
+    from mutagen.aac import AAC
+    from mutagen.wave import WAVE
+
+#Parser of every extension: a known extension is parsed directly, without AudioFile sniffing the file type first
+_PARSERS = {
+    ext: parser
+    for ext, parser in (('.mp3', MP3), ('.flac', FLAC), ('.ogg', OggVorbis), ('.m4a', MP4), ('.aac', AAC), ('.wav', WAVE))
+    if parser is not None
+}
 
 # ========================== CONFIGURATION ==========================
 AUDIO_EXTENSIONS = ('.mp3', '.wav', '.aac', '.flac', '.ogg', '.m4a')
+AUDIO_EXT_SET = frozenset(AUDIO_EXTENSIONS)
+
+#Lossy files smaller than this (MB) are not opened: they are logged as not needing a compression without
+#reading their metadata. It speeds up the scans of libraries with many small files, but a short track with
+#a large cover art can be oversized while still below the limit, so it is off (0) by default.
+MIN_LOSSY_SIZE_MB = 0
+LOSSY_EXTENSIONS = frozenset({'.mp3', '.ogg', '.m4a', '.aac'})
 
 # this value can be tailored for more strict or less strict detections
 # TOLERANCE should never go below 1.0. If the TOLERANCE would go below 1, you risk attempting to compressing files which cannot be reduced in size any longer.
@@ -21,11 +56,35 @@ INPUT_ROOT_DIR = r"D:\music all\music 7 (also new)"
 #An output directory where backups for the detected files will be stored
 ORIGINAL_BACKUPS_OUT_DIR = r".\Audio_Originals_Backup"
 
+#True = a backup on the same volume is a hard link to the original instead of a copy (instant, takes no space).
+#WARNING: the link and the original are the SAME data on the disk. Overwriting an original in place with its
+#compressed file (Explorer "Replace", copy, cp...) then overwrites the backup too. Only turn it on if the
+#originals are always deleted (or moved) before the compressed files are put in their place.
+BACKUP_WITH_HARDLINKS = False
+
 #An output directory where the resulted compressed files will be stored
 COMPRESSED_OUT_DIR = r".\Audio_Compressed"
 
 #Target bitrate for the compression of the audio files
 TARGET_BITRATE = "128k"
+TARGET_BITRATE_KBPS = float(TARGET_BITRATE.rstrip("kK"))
+
+
+#Number of files whose metadata is read at the same time while scanning
+#(mostly waiting on the disk: 16-32 is good for SSDs, use 2-4 for a mechanical HDD to avoid seek thrashing)
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+#Number of ffmpeg compressions running at the same time (each ffmpeg process encodes on a single thread)
+COMPRESS_WORKERS = os.cpu_count() or 1
+
+#Number of files queued at most for the metadata readers while the directories are still being listed
+SCAN_QUEUE_SIZE = SCAN_WORKERS * 4
+
+#Cache of the metadata read by previous runs: only new or modified files (other size/modification time) are parsed again
+USE_SCAN_CACHE = True
+SCAN_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "audio_scan.sqlite")
+#Number of new cache entries stored together in one transaction
+SCAN_CACHE_BATCH = 500
 
 
 #Flags controlling the features of the scripts
@@ -37,16 +96,41 @@ LOG_ONLY_FLAGGED = True
 ATTEMPT_COMPRESSION = True 
 # ===================================================================
 
+#Console output of the script. The messages are collected in memory and written in blocks of 1000
+#(warnings and errors right away) instead of one flushed print per message
+logger = logging.getLogger("scan_detect_perform_compressions")
+
+
+def setup_console_logger():
+    '''Attaches the buffered console handler to the logger'''
+    if os.name == "nt":
+        #the Windows console is line buffered by default: one write per line
+        sys.stdout.reconfigure(line_buffering=False)
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    buffered = logging.handlers.MemoryHandler(capacity=1000, flushLevel=logging.WARNING, target=console)
+    logger.addHandler(buffered)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
 #Read the current timestamp and append it to the name of the log file.
 timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 LOG_FILE = f"audio_compression_log_{timestamp}.txt"
 
+#The scanned paths start with the root directory, so their relative path is a plain string slice
+_ROOT_PREFIX = os.path.normpath(INPUT_ROOT_DIR) + os.sep
 
-def analyze_audio(file_path):
-    """Extracts metadata and computes expected vs actual size."""
+
+def read_metadata(file_path):
+    """Returns (duration in seconds, bitrate in bits/s) of an audio file, None if they can't be read."""
     
     #Opening audio file using mutagen and storing the file's metadata to variables
-    audio = AudioFile(file_path)
+    parser = _PARSERS.get(os.path.splitext(file_path)[1].lower())
+    try:
+        audio = parser(file_path) if parser else AudioFile(file_path)
+    except Exception:
+        #the content doesn't match the extension (e.g. Opus in an .ogg file): let AudioFile detect the type
+        audio = AudioFile(file_path)
     if not audio or not audio.info:
         #if the file is not an audio file
         return None
@@ -58,12 +142,25 @@ def analyze_audio(file_path):
         #if the bitrate is not specified within the metadata
         return None
     
+    return duration, bitrate
+
+
+def analyze_audio(file_path, file_size, metadata=None):
+    """Extracts metadata and computes expected vs actual size (file_size in bytes, as found while scanning).
+    metadata is the (duration, bitrate) of the file when already known (e.g. from the scan cache)."""
+    
+    if metadata is None:
+        metadata = read_metadata(file_path)
+        if metadata is None:
+            return None
+    duration, bitrate = metadata
+    
     #calculate the bitrate in kpbs
     bitrate_kbps = bitrate / 1000
     
     #calculate an expected size based on the bitrate
     expected_size_mb = (bitrate_kbps * duration) / (8 * 1024)
-    actual_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    actual_size_mb = file_size / (1024 * 1024)
     
     #checking if the file would need a compression
     needs_compression = actual_size_mb > expected_size_mb * TOLERANCE
@@ -79,23 +176,173 @@ def analyze_audio(file_path):
     }
 
 
+def skipped_result(file_path, file_size):
+    """Result of a file that was not analyzed (below MIN_LOSSY_SIZE_MB): it never needs a compression."""
+    return {
+        "file": file_path,
+        "duration_sec": "n/a",
+        "bitrate_kbps": "n/a",
+        "actual_size_mb": round(file_size / (1024 * 1024), 2),
+        "expected_size_mb": f"n/a (below MIN_LOSSY_SIZE_MB = {MIN_LOSSY_SIZE_MB})",
+        "needs_compression": False,
+    }
+
+
+def _is_audio(name):
+    '''True if the file name has one of the AUDIO_EXTENSIONS (only the extension is lowercased, one set lookup)'''
+    _, dot, ext = name.rpartition(".")
+    return bool(dot) and "." + ext.lower() in AUDIO_EXT_SET
+
+
+def _walk(path):
+    '''Recursively yields the DirEntry of every audio file under path.
+    os.scandir already knows the type of every entry, so no extra stat call is made per file or folder.'''
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                #descend into the sub-directory
+                yield from _walk(entry.path)
+            elif _is_audio(entry.name) and entry.is_file():
+                #the extension is checked on the bare name, before any path is built
+                #(a symlink to an audio file is scanned like the file itself, as os.walk listed it)
+                yield entry
+
+
+def _audio_files(root_dir):
+    '''Yields (path, size in bytes, modification time in ns) for every audio file under root_dir.'''
+    if hasattr(os, "fwalk"):
+        #POSIX: fwalk keeps every directory open, so each file is stat-ed relative to its directory fd
+        #instead of resolving its whole path again
+        for root, _, files, rootfd in os.fwalk(root_dir):
+            for name in files:
+                if _is_audio(name):
+                    #symlinks are followed, like os.walk a symlink to an audio file is scanned as the file
+                    try:
+                        st = os.stat(name, dir_fd=rootfd)
+                    except FileNotFoundError:
+                        #broken symlink
+                        continue
+                    if stat.S_ISREG(st.st_mode):
+                        yield os.path.join(root, name), st.st_size, st.st_mtime_ns
+    else:
+        #Windows: DirEntry.stat is cached by scandir, so the size comes without another syscall
+        for entry in _walk(root_dir):
+            st = entry.stat()
+            yield entry.path, st.st_size, st.st_mtime_ns
+
+
+def open_scan_cache():
+    '''Opens (and creates if needed) the sqlite scan cache, returns the connection'''
+    os.makedirs(os.path.dirname(SCAN_CACHE_FILE), exist_ok=True)
+    conn = sqlite3.connect(SCAN_CACHE_FILE)
+    #WAL: the writes of a scan are appended to a log file instead of rewriting the database pages
+    conn.execute("PRAGMA journal_mode=WAL")
+    #duration/bitrate are NULL for the files without usable metadata (they are not parsed again either)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, duration REAL, bitrate INTEGER)"
+    )
+    return conn
+
+
 def scan_directory(root_dir):
-    '''This function will scan the given directory and for each file in the directory will call analyze_audio'''
-    results = []
-    
-    # for each directory under the filepath
-    for root, _, files in os.walk(root_dir):
-        # for each file in the directory
-        for file in files:
-            #if file has an audio file extensions
-            if file.lower().endswith(AUDIO_EXTENSIONS):
-                #store the filepath and get the metadata info
-                file_path = os.path.join(root, file)
-                info = analyze_audio(file_path)
-                if info:
-                    #if the file was an audio file then append it to the results
-                    results.append(info)
-    return results
+    '''This function will scan the given directory and for each file in the directory will call analyze_audio.
+    The results are yielded as soon as they are ready (not in the walk order), so the caller never has to hold
+    all of them in memory: at most SCAN_QUEUE_SIZE files are waiting on the metadata readers at any time.'''
+    skipped = 0
+    min_lossy_size = MIN_LOSSY_SIZE_MB * 1024 * 1024
+    
+    #future of every metadata read still running → (path, size, mtime_ns) of its file
+    pending = {}
+    #new entries of the scan cache, written every SCAN_CACHE_BATCH files
+    new_rows = []
+    
+    conn = open_scan_cache() if USE_SCAN_CACHE else None
+    
+    def finished(done):
+        '''Yields the results of the completed metadata reads and queues their cache entries'''
+        for future in done:
+            path, size, mtime_ns = pending.pop(future)
+            m = future.result()
+            if conn is not None:
+                new_rows.append((path, mtime_ns, size, *(m or (None, None))))
+                if len(new_rows) >= SCAN_CACHE_BATCH:
+                    save_rows()
+            if m is not None:
+                #if the file was an audio file then hand over its result
+                yield analyze_audio(path, size, m)
+    
+    def save_rows():
+        '''Stores the queued cache entries in a single transaction'''
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, duration, bitrate) VALUES (?, ?, ?, ?, ?)",
+                new_rows
+            )
+        new_rows.clear()
+    
+    try:
+        #get the metadata info of SCAN_WORKERS files at a time (the threads overlap the disk waits)
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            # for every audio file under the filepath, together with its size and modification time
+            for path, size, mtime_ns in _audio_files(root_dir):
+                if size < min_lossy_size and os.path.splitext(path)[1].lower() in LOSSY_EXTENSIONS:
+                    #small lossy file: not worth opening, it is recorded as not needing a compression
+                    skipped += 1
+                    yield skipped_result(path, size)
+                    continue
+                
+                if conn is not None:
+                    #a cached entry is only valid if the file still has the same size and modification time
+                    row = conn.execute(
+                        "SELECT duration, bitrate FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                        (path, size, mtime_ns)
+                    ).fetchone()
+                    if row is not None:
+                        #the size check is redone on every run, so a TOLERANCE change applies to the cached files too
+                        if row[0] is not None:
+                            yield analyze_audio(path, size, row)
+                        continue
+                
+                pending[executor.submit(read_metadata, path)] = (path, size, mtime_ns)
+                if len(pending) >= SCAN_QUEUE_SIZE:
+                    #the queue is full: wait for a read to complete before listing more files
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from finished(done)
+            
+            #the last reads
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        
+        if new_rows:
+            save_rows()
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    if skipped:
+        logger.info(f"Not analyzed: {skipped} lossy files smaller than {MIN_LOSSY_SIZE_MB} MB (MIN_LOSSY_SIZE_MB).\n")
+
+
+@functools.lru_cache(maxsize=None)
+def available_encoders():
+    """Returns the names of the encoders of the installed ffmpeg (asked once, then remembered)."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+    except OSError:
+        return frozenset()
+    
+    #The list starts after the " ------" line, one encoder per line: " A....D libmp3lame   description"
+    lines = result.stdout.splitlines()
+    start = next((i + 1 for i, line in enumerate(lines) if line.strip().startswith("---")), len(lines))
+    return frozenset(line.split()[1] for line in lines[start:] if len(line.split()) > 1)
 
 
 def get_output_extension_and_codec(input_ext):
@@ -136,7 +383,8 @@ def get_output_extension_and_codec(input_ext):
     
     #if file is .aac of .m4a
     elif input_ext in ('.aac', '.m4a'):
-        return '.m4a', 'aac'
+        # libfdk_aac (only in ffmpeg builds compiled with it) gives better quality per bit than the built-in aac
+        return '.m4a', 'libfdk_aac' if 'libfdk_aac' in available_encoders() else 'aac'
         '''
         CODEC: AAC — aac or libfdk_aac
 
@@ -184,18 +432,108 @@ def get_output_extension_and_codec(input_ext):
 
 
 
-def compress_with_ffmpeg(src_path, dest_path, bitrate, codec):
+#Encoder options trading a bit of encoding effort for speed (the size is still set by the bitrate)
+ENCODER_SPEED_OPTIONS = {
+    "libmp3lame": ["-compression_level", "5"],  # LAME algorithm quality 5 instead of the slower default
+    "aac": ["-aac_coder", "fast"],              # fast coder instead of the default "twoloop" search
+}
+
+
+def encoder_options(codec, bitrate):
+    """Returns the ffmpeg output options for the audio encoder.
+    codec "copy" keeps the audio stream as it is (only the container is rewritten)."""
+    if codec == "copy":
+        # no re-encoding: bitrate, sample rate and channels stay the ones of the source
+        return ["-c:a", "copy"]
+    
+    return [
+        "-c:a", codec,          # set codec
+        
+        # one encoding thread per ffmpeg (not -threads 0): COMPRESS_WORKERS ffmpeg processes already run
+        # side by side, and these audio encoders don't split a single stream over threads anyway
+        "-threads", "1",
+        
+        *ENCODER_SPEED_OPTIONS.get(codec, []),
+        "-b:a", bitrate,        # target bitrate
+        "-ar", "44100",         # resample
+        "-ac", "2",             # stereo
+    ]
+
+
+#Output directories already created by this run
+_created_dirs = set()
+
+
+def _ensure_dir(path):
+    """os.makedirs(path, exist_ok=True), but every directory hits the filesystem only once per run."""
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
+
+#Formats ffmpeg can read from a pipe (no seeking back needed), see tee_to in compress_with_ffmpeg.
+#MP4/M4A is missing on purpose: its index (moov atom) is often stored at the end of the file.
+PIPE_INPUT_EXTENSIONS = frozenset({'.mp3', '.aac', '.flac', '.ogg', '.wav'})
+
+
+def _reader_gone(error):
+    """True if the OSError of a pipe write means that ffmpeg stopped reading its input (it exited):
+    BrokenPipeError on POSIX, EINVAL on Windows (the same check as subprocess does for its stdin)."""
+    return isinstance(error, BrokenPipeError) or error.errno == errno.EINVAL
+
+
+def _tee_into(src_path, backup_dest, pipe):
+    """Reads src_path once, writing every chunk both to backup_dest (the backup copy) and into pipe (ffmpeg's input).
+    If the backup copy fails, the partial backup_dest is removed and the OSError is raised."""
+    feeding = True
+    try:
+        with open(src_path, "rb") as src, open(backup_dest, "wb") as backup:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                backup.write(chunk)
+                if feeding:
+                    try:
+                        pipe.write(chunk)
+                    except OSError as e:
+                        if not _reader_gone(e):
+                            raise
+                        #ffmpeg stopped early (it failed or doesn't need the rest), the backup copy is still completed
+                        feeding = False
+        shutil.copystat(src_path, backup_dest)
+    except BaseException:
+        #never leave a truncated copy in the backups
+        try:
+            os.remove(backup_dest)
+        except OSError:
+            pass
+        raise
+    try:
+        pipe.close()
+    except OSError as e:
+        if not _reader_gone(e):
+            raise
+
+
+def compress_with_ffmpeg(src_path, dest_path, bitrate, codec, log=logger.info, tee_to=None):
     """Use FFmpeg to compress an audio file to a specific bitrate and codec.
     The compression will remove and cover-art that may be used for the thumbnail of the file.
+    The messages are passed to log (logged by default).
+    
+    With tee_to, the source file is read only once: while it is fed to ffmpeg through a pipe,
+    the same data is written to tee_to (the backup copy). An OSError means that backup failed
+    (an ffmpeg that can't be started is a failed compression, reported through log like the ffmpeg errors).
     """
     
     #Creating the directories for the output
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    _ensure_dir(os.path.dirname(dest_path))
     
     #Creating the cmd command for the ffmpeg compression
     cmd = [
         "ffmpeg", "-y",
-        "-i", src_path,         # specify the source file
+        "-hide_banner", "-nostats", "-loglevel", "error",  # ffmpeg only writes something when it fails
+        "-i", "pipe:0" if tee_to else src_path,  # specify the source file (or read it from stdin)
         "-map", "0:a",          # keep only audio streams, remove video cover-art
         
         #Audio/video files often have multiple "streams":
@@ -212,87 +550,193 @@ def compress_with_ffmpeg(src_path, dest_path, bitrate, codec):
                 #-map 0:a → Include only audio streams
         #It’s redundant(not both necessary) but safe — many scripts use both for clarity and robustness.
         
-        "-c:a", codec,          # set codec
-        "-b:a", bitrate,        # target bitrate
-        "-ar", "44100",         # resample
-        "-ac", "2",             # stereo
+        *encoder_options(codec, bitrate),
         "-movflags", "+faststart",
         dest_path
     ]
 
-    print(f"\nRunning FFmpeg: {' '.join(cmd)}")
+    #the full command line is only shown at the DEBUG level
+    logger.debug(f"Running FFmpeg: {' '.join(cmd)}")
 
     #Attempt to run the ffmpeg command to perform the compression
+    #(the error output goes to a temporary file instead of a pipe held in memory, only its end is read on failure)
+    with tempfile.TemporaryFile() as err:
+        try:
+            if tee_to is None:
+                try:
+                    subprocess.run(
+                        cmd,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.DEVNULL,
+                        stderr=err,
+                        check=True,
+                    )
+                except OSError as e:
+                    #ffmpeg is missing from PATH or can't be executed
+                    log(f"⚠️ FFmpeg could not be started for {src_path}: {e}")
+                    return False
+            else:
+                #bufsize=0: every chunk goes straight to ffmpeg, nothing is left to flush when the pipe closes
+                try:
+                    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=err,
+                                               bufsize=0)
+                except OSError as e:
+                    #ffmpeg can't be started: the backup copy is still made, on its own
+                    log(f"⚠️ FFmpeg could not be started for {src_path}: {e}")
+                    shutil.copy2(src_path, tee_to)
+                    return False
+                with process:
+                    try:
+                        _tee_into(src_path, tee_to, process.stdin)
+                    except OSError:
+                        process.kill()
+                        raise
+                if process.returncode != 0:
+                    raise subprocess.CalledProcessError(process.returncode, cmd)
+            
+            if os.path.exists(dest_path):
+                new_size = os.path.getsize(dest_path) / (1024 * 1024)
+                log(f"✅ Output size: {new_size:.2f} MB")
+            else:
+                log("⚠️ No output file created.")
+            return True
+        
+        except subprocess.CalledProcessError:
+            #If there was any exception thrown while attempting compression: show the last 500 bytes of ffmpeg's output
+            err.seek(max(0, err.seek(0, os.SEEK_END) - 500))
+            log(f"⚠️ FFmpeg error compressing {src_path}:\n{err.read().decode(errors='ignore')}")
+            return False
+
+
+def _process_one(r):
+    """Backs up and compresses one flagged file. Runs on a worker thread of handle_flagged_files.
+    Returns (src_path, ok, new_size_mb); new_size_mb is None when nothing was compressed."""
+    src_path = r["file"]
+    if src_path.startswith(_ROOT_PREFIX):
+        rel_path = src_path[len(_ROOT_PREFIX):]
+    else:
+        rel_path = os.path.relpath(src_path, INPUT_ROOT_DIR)
+    src_ext = os.path.splitext(src_path)[1]
+    
+    #The messages of this file are collected and logged together at the end (one record, never mixed with other files)
+    messages = []
+
+    # Backup original file
+    backup_dest = os.path.join(ORIGINAL_BACKUPS_OUT_DIR, rel_path)
+    
+    # Creating the backup directory
+    _ensure_dir(os.path.dirname(backup_dest))
+    
+    ok = False
+    new_size = None
+    tee = False
     try:
-        subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True,
-        )
-        if os.path.exists(dest_path):
-            new_size = os.path.getsize(dest_path) / (1024 * 1024)
-            print(f"✅ Output size: {new_size:.2f} MB")
+        needs_copy = True
+        if BACKUP_WITH_HARDLINKS:
+            try:
+                #Same volume: a hard link makes the backup instantly, without reading or writing the audio data
+                #(neither the original nor its backup is modified by this script)
+                os.link(src_path, backup_dest)
+                needs_copy = False
+            except FileExistsError:
+                #Backup left by a previous run: refresh it, unless it is already a link to this very file
+                needs_copy = not os.path.samefile(src_path, backup_dest)
+            except OSError:
+                #Different volume or a filesystem without hard links (FAT/exFAT) → real copy
+                pass
+        elif os.path.exists(backup_dest) and os.path.samefile(src_path, backup_dest):
+            #Hard link left by a run with BACKUP_WITH_HARDLINKS: only the link is removed, the backup becomes
+            #a real copy (copying into the link would write into the original itself)
+            os.remove(backup_dest)
+        
+        if needs_copy and ATTEMPT_COMPRESSION and src_ext.lower() in PIPE_INPUT_EXTENSIONS:
+            #The copy is made while the file is piped into ffmpeg below: the source is read only once
+            tee = True
         else:
-            print("⚠️ No output file created.")
-        return True
+            if needs_copy:
+                shutil.copy2(src_path, backup_dest)
+            messages.append(f"📦 Backed up: {rel_path}")
+        ok = True
+    
+    except Exception as e:
+        messages.append(f"⚠️ Failed to back up {src_path}: {e}")
+
+    # Compress file if oversize was detected
+    if ok and ATTEMPT_COMPRESSION:
+        new_ext, codec = get_output_extension_and_codec(src_ext)
+        if new_ext == src_ext.lower() and r["bitrate_kbps"] <= TARGET_BITRATE_KBPS:
+            #The audio is already at (or below) the target bitrate: re-encoding can't make it smaller,
+            #the oversize comes from the rest of the file (cover art, tags), so only the audio stream is copied
+            codec = "copy"
+        rel_path_compressed = os.path.splitext(rel_path)[0] + new_ext
+        compressed_dest = os.path.join(COMPRESSED_OUT_DIR, rel_path_compressed)
+        _ensure_dir(os.path.dirname(compressed_dest))
+
+        try:
+            ok = compress_with_ffmpeg(src_path, compressed_dest, TARGET_BITRATE, codec, log=messages.append,
+                                      tee_to=backup_dest if tee else None)
+        except OSError as e:
+            #the backup copy written along the compression failed
+            messages.append(f"⚠️ Failed to back up {src_path}: {e}")
+            ok = False
+        else:
+            if tee:
+                messages.insert(0, f"📦 Backed up: {rel_path}")
+            
+            if ok and os.path.exists(compressed_dest):
+                new_size = os.path.getsize(compressed_dest) / (1024 * 1024)
+                messages.append(f"✅ Compressed: {rel_path} → {new_ext} ({new_size:.2f} MB)")
+            elif not ok:
+                messages.append(f"⚠️ Compression failed for: {rel_path}")
+
+    logger.log(logging.INFO if ok else logging.WARNING, "\n" + "\n".join(messages))
     
-    except subprocess.CalledProcessError as e:
-        #If there was any exception thrown while attempting compression
-        print(f"⚠️ FFmpeg error compressing {src_path}:\n{e.stderr.decode(errors='ignore')[:500]}")
-        return False
+    return src_path, ok, new_size
 
 
-def handle_flagged_files(results):
+def handle_flagged_files(flagged_files):
     """Backs up and compresses flagged files."""
-    flagged_files = [r for r in results if r["needs_compression"]]
     
     if not flagged_files:
-        print("\nNo flagged files found.")
+        logger.info("\nNo flagged files found.")
         return
 
-    print(f"\nProcessing {len(flagged_files)} flagged files...")
+    logger.info(f"\nProcessing {len(flagged_files)} flagged files...")
 
-    for r in flagged_files:
-        src_path = r["file"]
-        rel_path = os.path.relpath(src_path, INPUT_ROOT_DIR)
-        src_ext = os.path.splitext(src_path)[1]
+    #COMPRESS_WORKERS files are handled at the same time, each by its own ffmpeg process
+    #(the threads only wait on ffmpeg, so a thread pool is enough)
+    with ThreadPoolExecutor(max_workers=min(COMPRESS_WORKERS, len(flagged_files))) as executor:
+        outcomes = list(executor.map(_process_one, flagged_files))
 
-        # Backup original file
-        backup_dest = os.path.join(ORIGINAL_BACKUPS_OUT_DIR, rel_path)
-        
-        # Creating the backup directory
-        os.makedirs(os.path.dirname(backup_dest), exist_ok=True)
-        
-        try:
-            shutil.copy2(src_path, backup_dest)
-            print(f"📦 Backed up: {rel_path}")
-        
-        except Exception as e:
-            print(f"⚠️ Failed to back up {src_path}: {e}")
-            continue
-
-        # Compress file if oversize was detected
-        if ATTEMPT_COMPRESSION:
-            new_ext, codec = get_output_extension_and_codec(src_ext)
-            rel_path_compressed = os.path.splitext(rel_path)[0] + new_ext
-            compressed_dest = os.path.join(COMPRESSED_OUT_DIR, rel_path_compressed)
-            os.makedirs(os.path.dirname(compressed_dest), exist_ok=True)
-
-            ok = compress_with_ffmpeg(src_path, compressed_dest, TARGET_BITRATE, codec)
-            
-            if ok:
-                new_size = os.path.getsize(compressed_dest) / (1024 * 1024)
-                print(f"✅ Compressed: {rel_path} → {new_ext} ({new_size:.2f} MB)")
-            else:
-                print(f"⚠️ Compression failed for: {rel_path}")
+    failed = sum(1 for _, ok, _ in outcomes if not ok)
+    if failed:
+        logger.warning(f"\n⚠️ {failed} of {len(outcomes)} flagged files failed.")
+
+    logger.info("\n✔️ Backup and compression process complete.")
 
-    print("\n✔️ Backup and compression process complete.")
+
+#One log entry per file (filled with the result dict of analyze_audio)
+LOG_RECORD_TEMPLATE = (
+    "File: {file}\n"
+    "Duration (s): {duration_sec}\n"
+    "Bitrate (kbps): {bitrate_kbps}\n"
+    "Actual Size (MB): {actual_size_mb}\n"
+    "Expected Size (MB): {expected_size_mb}\n"
+    "Needs Compression: {needs}\n"
+    + "-" * 60 + "\n"
+)
+
+#Number of log entries collected before they are written to the log file in one go
+LOG_BATCH_SIZE = 1000
 
 
 def save_log(results):
-    '''This function will save the log after the processing is done'''
-    with open(LOG_FILE, "w", encoding="utf-8") as log:
+    '''This function writes the log while the results are coming in (results can be the scan_directory generator).
+    Only the flagged results are kept, they are returned for the compression step'''
+    flagged = []
+    total = 0
+    records = []
+    with open(LOG_FILE, "w", encoding="utf-8", buffering=1 << 20) as log:
         log.write("Audio Compression Analysis Log\n")
         log.write(f"Scan Path: {INPUT_ROOT_DIR}\n")
         log.write(f"Tolerance: {TOLERANCE}\n")
@@ -301,30 +745,31 @@ def save_log(results):
         log.write("=" * 100 + "\n\n")
 
         for r in results:
-            if LOG_ONLY_FLAGGED and not r["needs_compression"]:
+            total += 1
+            if r["needs_compression"]:
+                flagged.append(r)
+            elif LOG_ONLY_FLAGGED:
                 continue
-            log.write(f"File: {r['file']}\n")
-            log.write(f"Duration (s): {r['duration_sec']}\n")
-            log.write(f"Bitrate (kbps): {r['bitrate_kbps']}\n")
-            log.write(f"Actual Size (MB): {r['actual_size_mb']}\n")
-            log.write(f"Expected Size (MB): {r['expected_size_mb']}\n")
-            log.write(f"Needs Compression: {'YES' if r['needs_compression'] else 'NO'}\n")
-            log.write("-" * 60 + "\n")
-
-        flagged = [r for r in results if r["needs_compression"]]
+            records.append(LOG_RECORD_TEMPLATE.format(needs="YES" if r["needs_compression"] else "NO", **r))
+            if len(records) >= LOG_BATCH_SIZE:
+                log.writelines(records)
+                records.clear()
+        log.writelines(records)
+
         log.write("\nSummary:\n")
-        log.write(f"Total files analyzed: {len(results)}\n")
+        log.write(f"Total files analyzed: {total}\n")
         log.write(f"Files flagged for compression: {len(flagged)}\n")
 
-    print(f"\n📘 Log saved to: {LOG_FILE}")
-    print(f"Files flagged for compression: {len([r for r in results if r['needs_compression']])}")
+    logger.info(f"\n📘 Log saved to: {LOG_FILE}")
+    logger.info(f"Files flagged for compression: {len(flagged)}")
+    return flagged
 
 
 def main():
-    print(f"Scanning {INPUT_ROOT_DIR} for audio files...\n")
-    results = scan_directory(INPUT_ROOT_DIR)
-    save_log(results)
-    handle_flagged_files(results)
+    setup_console_logger()
+    logger.info(f"Scanning {INPUT_ROOT_DIR} for audio files...\n")
+    flagged = save_log(scan_directory(INPUT_ROOT_DIR))
+    handle_flagged_files(flagged)
 
 
 if __name__ == "__main__":
@@ -2,11 +2,22 @@ import subprocess
 import re
 import os
 import shlex
+import shelve
+import hashlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 
 # Configuration
 INPUT_ROOT_FOLDER = r"C:\Users\black\Desktop\audio_files"
 DEST_OUT_FOLDER = r"./out_trimmed"
 LOG_FILE = "detect_log_and_trim_silence_log.txt"
+MAX_WORKERS = os.cpu_count()  # Number of files analyzed in parallel (each worker runs its own ffmpeg process)
+AUDIO_EXTS = frozenset({".mp3", ".wav", ".flac", ".m4a"})  # Audio file extensions to analyze
+LOG_FLUSH_EVERY = 100  # Log records are collected and written to the log file in one go every this many files
+
+# Cache of the silence detection results
+USE_CACHE = True  # Re-runs skip ffmpeg for the files that didn't change since the previous run
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".silence_cache")
 
 # Detection parameters
 NOISE_LEVEL = -45   # Sensitivity of silence detection (more negative = more sensitive)
@@ -15,6 +26,25 @@ SAFE_START_LIMIT = 2.5  # Only trim start if silence occurs before this
 SAFE_END_LIMIT = 2.5    # Only trim end if silence is within this many seconds of the end
 MIN_TRIM_SILENCE = 2.5  # Ignore detected silences shorter than this
 MAX_SILENCE_TO_TRIM = 60.0  # Optional: ignore unrealistically long silence segments (e.g. bad detection)
+START_SILENCE_MAX_END = 10  # A start silence is only trimmed if it ends before this (sec)
+END_SECTION_RATIO = 0.85    # A long silence is trimmed as "ending" if it reaches past this fraction of the track
+
+SCAN_EDGES_ONLY = True  # Only decode the beginning and the ending of each track (see below)
+'''
+The trim rules only ever act on silence at the very beginning (ending before START_SILENCE_MAX_END)
+and at the ending (last SAFE_END_LIMIT seconds, or a silence reaching past END_SECTION_RATIO of the track).
+With SCAN_EDGES_ONLY, silencedetect runs on those two sections only, using input seeking (-ss before -i),
+so the middle of the track is never decoded: a 60-minute recording costs ~10 minutes of decoding, a song roughly half.
+
+The trim points are the same as with a full scan, but the log of a file can differ:
+the "Detected N significant silences" count no longer includes the silences in the middle of the track,
+and a long silence crossing the edge of a scanned section is only seen up to that edge.
+So a file without a trim can be logged as [KEEP ORIGINAL] instead of [IGNORED SILENCE] (or the other way round):
+e.g. a silence over most of the track is too long to trim (ignored) on a full scan, while its clipped part
+at the beginning is short enough to count (but not trimmable, it ends after START_SILENCE_MAX_END).
+Turn SCAN_EDGES_ONLY off if you need the log categories of a full scan.
+Tracks shorter than ~1.5 minutes are still scanned whole (the beginning is not decoded twice).
+'''
 
 # ------------------------------------------------------------
 # TUNING GUIDE:
@@ -49,8 +79,34 @@ MAX_SILENCE_TO_TRIM = 60.0  # Optional: ignore unrealistically long silence segm
 
 # Preprocessing controls
 USE_HIGHPASS = True      # Filter out sub-bass rumble before silence detection
-USE_LOUDNORM = True      # Normalize loudness for consistent detection
+USE_LOUDNORM = False     # Normalize loudness for consistent detection (off by default, see LOUDNORM_FILTER)
 USE_BANDPASS = True      # Apply both high-pass and low-pass filters for best accuracy (slower but safer)
+USE_MONO_DOWNMIX = True  # Analyze a mono downmix: every filter of the chain processes 1 channel instead of 2
+
+# Normalization filter used when USE_LOUDNORM is on
+LOUDNORM_FILTER = "dynaudnorm=f=500:g=15"
+'''
+dynaudnorm is a light look-ahead gain: it evens out quiet and loud songs well enough for silence detection
+and is several times cheaper than the EBU R128 loudnorm filter ("loudnorm=I=-23:TP=-1.5:LRA=11"),
+which integrates the loudness over the whole file (+2–3 seconds per file).
+Put the loudnorm string back here if you need the exact -23 LUFS normalization.
+'''
+
+# Fast mode: trim leading/trailing silence with a single ffmpeg run (silenceremove filter)
+USE_SILENCEREMOVE = False
+'''
+USE_SILENCEREMOVE replaces the whole detect → probe → trim flow with ONE ffmpeg call per file:
+the silenceremove filter removes the leading silence, the audio is reversed, the (now leading)
+trailing silence is removed, and the audio is reversed back. One decode instead of three.
+
+Trade-offs of the fast mode:
+every silence quieter than NOISE_LEVEL at the start/end is removed, no matter how short,
+the SAFE_START_LIMIT / SAFE_END_LIMIT / 85% rules and the band-pass/loudnorm preprocessing are not applied,
+every file is re-encoded into DEST_OUT_FOLDER (there is no [KEEP ORIGINAL] case),
+areverse keeps the whole decoded track in memory (fine for songs, heavy for hour-long recordings).
+
+Keep it False when you need the safe heuristics above.
+'''
 
 HIGHPASS_FREQ = 200
 '''
@@ -88,231 +144,438 @@ This helps it ignore ambience or reverberation that you don’t want to count as
 # Each enabled filter adds processing time:
 #   - BANDPASS (highpass+lowpass): Most accurate, slower
 #   - HIGHPASS only: Moderate accuracy, faster
-#   - LOUDNORM: Improves consistency, adds ~2–3 seconds per file
+#   - LOUDNORM: Improves consistency; dynaudnorm adds little, loudnorm adds ~2–3 seconds per file
+#   - MONO_DOWNMIX: Halves the work of every filter on stereo tracks
 #
 # For large libraries:
-#   - Disable LOUDNORM for faster runs
+#   - Keep LOUDNORM disabled (default) for faster runs
 #   - Keep BANDPASS if quality and accuracy are priorities
+#
+# Files are analyzed in parallel by MAX_WORKERS processes, each ffmpeg
+# running with a single thread (-threads 1) so the workers don't fight for cores.
+# Lower MAX_WORKERS if the library lives on a slow (USB/network) drive.
+#
+# With USE_CACHE the detected silences are stored in CACHE_FILE, so a re-run
+# (e.g. after tuning SAFE_START_LIMIT / SAFE_END_LIMIT) only analyzes new or modified files.
+# Changing NOISE_LEVEL, MIN_SILENCE or the preprocessing filters invalidates the cached results.
 # ------------------------------------------------------------
 
-# Regex for silence detection
-re_start = re.compile(r"silence_start: ([0-9.]+)")
-re_end = re.compile(r"silence_end: ([0-9.]+)")
-
-# --- Prepare log file ---
-with open(LOG_FILE, "w", encoding="utf-8") as log:
-    log.write("Enhanced silence detection and safe trimming results\n")
-    log.write("====================================================\n\n")
-
-    for root, _, files in os.walk(INPUT_ROOT_FOLDER):
-        for fname in files:
-            if not fname.lower().endswith((".mp3", ".wav", ".flac", ".m4a")):
-                continue
-
-            path = os.path.join(root, fname)
-            rel_path = os.path.relpath(path, INPUT_ROOT_FOLDER)
-            print(f"\nAnalyzing: {rel_path}")
-
-            # Build preprocessing chain
-            pre_filters = []
-
-            # ============================================================
-            # BAND-PASS FILTER: combines high-pass and low-pass
-            # ------------------------------------------------------------
-            # • Removes inaudible low-frequency noise (hum, mic pops, bass rumble)
-            # • Removes overly high frequencies (hiss, cymbals, reverb tails)
-            # • Leaves only the “core” midrange content where most music energy exists (200–3000 Hz)
-            # • Greatly improves silence detection accuracy on music with ambience or room noise
-            # • Slightly slower because it processes two filters in sequence
-            # ------------------------------------------------------------
-            # Turn this OFF (USE_BANDPASS = False) if:
-            #     - You’re processing speech or podcasts (you may want highs preserved)
-            #     - You want faster runs at the cost of precision
-            # ============================================================
-
-            if USE_BANDPASS:
-                pre_filters.append(f"highpass=f={HIGHPASS_FREQ}")
-                pre_filters.append(f"lowpass=f={LOWPASS_FREQ}")
-            else:
-                # ============================================================
-                # SIMPLE HIGH-PASS FILTER (used if band-pass is off)
-                # ------------------------------------------------------------
-                # • Keeps high frequencies intact, only removes deep bass rumble
-                # • Faster, less CPU usage, but may detect some false “sound” from reverb/hiss
-                # ------------------------------------------------------------
-                # Use this mode if:
-                #     - You want faster analysis
-                #     - You’re trimming spoken word or podcasts
-                # ============================================================
-                if USE_HIGHPASS:
-                    pre_filters.append(f"highpass=f={HIGHPASS_FREQ}")
-
-            # ============================================================
-            # LOUDNESS NORMALIZATION
-            # ------------------------------------------------------------
-            # • Makes all tracks analyzed at similar loudness (-23 LUFS target)
-            # • Prevents ffmpeg from missing quiet silences in very loud songs
-            # • Adds a few seconds to processing but stabilizes detection
-            # ------------------------------------------------------------
-            # You can disable (USE_LOUDNORM = False) if:
-            #     - Your library is already volume-normalized (modern mastered albums)
-            #     - You need faster performance
-            # ============================================================
-            if USE_LOUDNORM:
-                pre_filters.append("loudnorm=I=-23:TP=-1.5:LRA=11")
-
-            # Append silence detection filter
-            pre_chain = ",".join(pre_filters + [f"silencedetect=noise={NOISE_LEVEL}dB:d={MIN_SILENCE}"])
-
-            # Run silencedetect with preprocessing
-            
-            # Creating cmd command
-            cmd = [
-                "ffmpeg", "-hide_banner", "-nostats",
-                "-i", path,
-                "-af", pre_chain,
-                "-f", "null", "-"
-            ]
-
-            try:
-                # Run ffmpeg process for silence detection
-                result = subprocess.run(
-                    cmd,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace"
-                )
-            except Exception as e:
-                # Except any errors that may have occured while running ffmpeg process
-                print(f"Error analyzing {fname}: {e}")
-                continue
-            
-            # Filtering the results received from ffmpeg
-            starts = [float(x) for x in re_start.findall(result.stderr)]
-            ends = [float(x) for x in re_end.findall(result.stderr)]
-
-            if not starts or not ends:
-                print(" No silence detected")
-                log.write(f"[NO SILENCE] {rel_path}\n")
-                continue
-
-            # Pair up and filter silences
-            silence_pairs = list(zip(starts, ends))
-            filtered_pairs = [
-                (s, e)
-                for s, e in silence_pairs
-                if MIN_TRIM_SILENCE <= (e - s) <= MAX_SILENCE_TO_TRIM
-            ]
-
-            if not filtered_pairs:
-                print("  All detected silences ignored (too short or too long)")
-                log.write(f"[IGNORED SILENCE] {rel_path}\n")
-                continue
-
-            starts = [s for s, _ in filtered_pairs]
-            ends = [e for _, e in filtered_pairs]
-
-            print(f"  → Detected {len(starts)} significant silences (≥ {MIN_TRIM_SILENCE}s)")
-
-            # Determine safe trim points
-            start_trim = 0.0
-            end_trim = None
-
-            # ------------------------------------------------------------
-            # SILENCE VALIDATION LOGIC
-            # ------------------------------------------------------------
-            # We only trim silence at:
-            #   - The very beginning (SAFE_START_LIMIT window)
-            #   - The very end (SAFE_END_LIMIT or 85%+ of track length)
-            #
-            # This ensures that musical silence or artistic pauses
-            # in the *middle* of the track are never trimmed.
-            # ------------------------------------------------------------
-
-            # Check silence at start
-            if starts[0] < SAFE_START_LIMIT and ends[0] < 10:
-                start_trim = ends[0]
-                print(f"  Safe to trim start up to {start_trim:.2f}s")
-
-            # Check silence at end
-            
-            # Preparing cmd command
-            cmd_probe = [
-                "ffprobe", "-v", "error", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", path
-            ]
-            try:
-                # Run the ffprobe process
-                duration_str = subprocess.check_output(cmd_probe, text=True).strip()
-                duration = float(duration_str)
-            except Exception:
-                # Except any errors that may have occured while running ffprobe process
-                duration = None
-
-            if duration:
-                last_silence_start = starts[-1]
-                last_silence_end = ends[-1]
-                silence_len = last_silence_end - last_silence_start
-
-                # How close to the end the silence starts
-                distance_to_end = duration - last_silence_start
-
-                # Case A: Silence is very close to the end (within SAFE_END_LIMIT)
-                if distance_to_end <= SAFE_END_LIMIT:
-                    end_trim = last_silence_start
-                    print(f"  Safe to trim end (starts {distance_to_end:.2f}s before end, len={silence_len:.2f}s)")
-
-                # Case B: Silence covers big part of the ending
-                elif silence_len >= MIN_TRIM_SILENCE and last_silence_end >= (duration * 0.85):
-                    end_trim = last_silence_start
-                    print(f"  Trimming extended silence in final section "
-                          f"(starts at {last_silence_start:.2f}s, len={silence_len:.2f}s, track={duration:.2f}s)")
-
-            # Prepare output
-            out_path = os.path.join(DEST_OUT_FOLDER, rel_path)
-            os.makedirs(os.path.dirname(out_path), exist_ok=True)
-
-            # Check if trimming is required
-            if start_trim == 0.0 and end_trim is None:
-                print("  Keeping original (no safe trim needed)")
-                log.write(f"[KEEP ORIGINAL] {rel_path}\n")
-                continue
-            
-            # Build the trim command
-            cmd_trim = ["ffmpeg", "-hide_banner", "-nostats", "-y"]
-            
-            # Appending the trim start point
-            if start_trim > 0:
-                cmd_trim += ["-ss", str(start_trim)]
-            cmd_trim += ["-i", path]
-            
-            # Appending the trim end point
-            if end_trim:
-                if start_trim > 0:
-                    duration_out = end_trim - start_trim
-                    if duration_out <= 0:
-                        print(f"  Skipping (negative duration {duration_out:.2f}s)")
-                        log.write(f"[SKIPPED - BAD DURATION] {rel_path}\n")
-                        continue
-                    cmd_trim += ["-t", f"{duration_out:.2f}"]
-                else:
-                    cmd_trim += ["-to", str(end_trim)]
-            
-            # Appending the outputting location
-            cmd_trim += [out_path]
-
-            print("     Running safe trim:", " ".join(shlex.quote(c) for c in cmd_trim))
-
-            try:
-                # Run the ffmpeg process for trimming audio file
-                subprocess.run(cmd_trim, check=True)
-                log.write(f"[TRIMMED] {rel_path} (start={start_trim:.2f}, end={end_trim})\n")
-            
-            except subprocess.CalledProcessError:
-                # Excepting error in the ffmpeg process while trimming
-                print(f"      Failed to trim {rel_path}")
-                log.write(f"[TRIM FAILED] {rel_path}\n")
+# Start of every ffmpeg command: one thread per ffmpeg process, the parallelism comes from the
+# worker processes (MAX_WORKERS), so the files never compete with each other's decoding threads.
+# The input is probed with 200 KB / 0.2 s instead of the default 5 MB / 5 s (plenty for audio-only files),
+# and subtitle/data streams are ignored.
+FFMPEG_BASE = [
+    "ffmpeg", "-hide_banner", "-nostats", "-threads", "1",
+    "-probesize", "200000", "-analyzeduration", "200000",
+    "-sn", "-dn",
+]
+
+# Extra arguments for every ffmpeg process: on Windows no console window is created for it
+SPAWN_KW = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {}
+
+# Regex for silence detection (one pattern for both silence_start and silence_end)
+re_silence = re.compile(r"silence_(start|end): ([0-9.]+)")
+# ffmpeg prints the input duration in its header ("Duration: 00:03:25.41"), so no ffprobe call is needed
+re_dur = re.compile(r"Duration:\s+(\d+):(\d+):(\d+\.\d+)")
+
+
+def build_filter_chain():
+    '''Builds the ffmpeg audio filter chain used for silence detection (same for every file)'''
+    pre_filters = []
+
+    # ============================================================
+    # MONO DOWNMIX
+    # ------------------------------------------------------------
+    # • Mixes the channels down to one before any other filter runs
+    # • The band-pass, normalization and silencedetect filters then process half the samples on stereo files
+    # • Silence is a property of the whole mix, so detection results stay practically the same
+    # ------------------------------------------------------------
+    # (silencedetect's own "mono=1" option does the opposite: it checks every channel separately)
+    # ============================================================
+    if USE_MONO_DOWNMIX:
+        pre_filters.append("aformat=channel_layouts=mono")
+
+    # ============================================================
+    # BAND-PASS FILTER: combines high-pass and low-pass
+    # ------------------------------------------------------------
+    # • Removes inaudible low-frequency noise (hum, mic pops, bass rumble)
+    # • Removes overly high frequencies (hiss, cymbals, reverb tails)
+    # • Leaves only the “core” midrange content where most music energy exists (200–3000 Hz)
+    # • Greatly improves silence detection accuracy on music with ambience or room noise
+    # • Slightly slower because it processes two filters in sequence
+    # ------------------------------------------------------------
+    # Turn this OFF (USE_BANDPASS = False) if:
+    #     - You’re processing speech or podcasts (you may want highs preserved)
+    #     - You want faster runs at the cost of precision
+    # ============================================================
+
+    if USE_BANDPASS:
+        pre_filters.append(f"highpass=f={HIGHPASS_FREQ}")
+        pre_filters.append(f"lowpass=f={LOWPASS_FREQ}")
+    else:
+        # ============================================================
+        # SIMPLE HIGH-PASS FILTER (used if band-pass is off)
+        # ------------------------------------------------------------
+        # • Keeps high frequencies intact, only removes deep bass rumble
+        # • Faster, less CPU usage, but may detect some false “sound” from reverb/hiss
+        # ------------------------------------------------------------
+        # Use this mode if:
+        #     - You want faster analysis
+        #     - You’re trimming spoken word or podcasts
+        # ============================================================
+        if USE_HIGHPASS:
+            pre_filters.append(f"highpass=f={HIGHPASS_FREQ}")
+
+    # ============================================================
+    # LOUDNESS NORMALIZATION
+    # ------------------------------------------------------------
+    # • Makes all tracks analyzed at similar loudness (LOUDNORM_FILTER)
+    # • Prevents ffmpeg from missing quiet silences in very loud songs
+    # • Adds processing time but stabilizes detection
+    # ------------------------------------------------------------
+    # You can disable (USE_LOUDNORM = False) if:
+    #     - Your library is already volume-normalized (modern mastered albums)
+    #     - You need faster performance
+    # ============================================================
+    if USE_LOUDNORM:
+        pre_filters.append(LOUDNORM_FILTER)
+
+    # Append silence detection filter
+    return ",".join(pre_filters + [f"silencedetect=noise={NOISE_LEVEL}dB:d={MIN_SILENCE}"])
+
+
+def run_silencedetect(cmd):
+    '''Runs an ffmpeg silencedetect command and returns (starts, ends, duration).
+
+    The ffmpeg output is read line by line while ffmpeg is still decoding,
+    so the parsing overlaps with the decoding and the output is never held in memory as a whole.
+    Raises RuntimeError if ffmpeg fails, so a failed run is never taken (and cached) as a file without silence.'''
+    starts = []
+    ends = []
+    duration = None
+    line = ""
+
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,  # ffmpeg never waits for keypresses on the console
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+        **SPAWN_KW
+    ) as process:
+        for line in process.stderr:
+            m = re_silence.search(line)
+            if m:
+                (starts if m[1] == "start" else ends).append(float(m[2]))
+            elif duration is None:
+                m = re_dur.search(line)
+                if m:
+                    duration = int(m[1]) * 3600 + int(m[2]) * 60 + float(m[3])
+
+    if process.returncode != 0:
+        # The last line ffmpeg wrote is its error message
+        raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {line.strip()}")
+
+    return starts, ends, duration
+
+
+# The filter chain does not depend on the file, so it is built only once
+PRE_CHAIN = build_filter_chain()
+PRE_CHAIN_HASH = hashlib.sha1(PRE_CHAIN.encode()).hexdigest()
+
+
+def cache_key(path):
+    '''Builds the cache key of a file.
+
+    The key changes whenever the file (size, modification time) or the detection settings change,
+    so changing SAFE_START_LIMIT, SAFE_END_LIMIT or the other trim rules still reuses the cached silences.'''
+    st = os.stat(path)
+    # When only the edges are scanned, the scanned sections of the track depend on
+    # START_SILENCE_MAX_END (length of the beginning), END_SECTION_RATIO and MAX_SILENCE_TO_TRIM (start of the ending)
+    scan_mode = (f"edges{START_SILENCE_MAX_END}:{END_SECTION_RATIO}:{MAX_SILENCE_TO_TRIM}"
+                 if SCAN_EDGES_ONLY else "full")
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{NOISE_LEVEL}|{MIN_SILENCE}|{PRE_CHAIN_HASH}|{scan_mode}"
+
+
+def silencedetect_cmd(path, seek=None, length=None):
+    '''Builds the silencedetect command, optionally limited to `length` seconds starting at `seek`'''
+    # Creating cmd command
+    cmd = [
+        *FFMPEG_BASE,
+        "-vn",  # ignore video streams (embedded cover art) so they are never decoded
+    ]
+    # Input options (before -i): ffmpeg jumps straight to `seek` and stops reading after `length`
+    if seek:
+        cmd += ["-ss", f"{seek:.3f}"]
+    if length:
+        cmd += ["-t", f"{length:.3f}"]
+    cmd += [
+        "-i", path,
+        "-af", PRE_CHAIN,
+        "-c:a", "pcm_s16le",  # cheapest raw codec for the discarded output
+        "-f", "null", "-"
+    ]
+    return cmd
+
+
+def detect_silences(path):
+    '''Runs silencedetect (with the preprocessing chain) on a file and returns (starts, ends, duration).
+
+    With SCAN_EDGES_ONLY only the beginning and the ending of the track are analyzed.'''
+    if not SCAN_EDGES_ONLY:
+        return run_silencedetect(silencedetect_cmd(path))
+
+    # Beginning: long enough to see the end of any silence the start rule accepts.
+    # This pass also reads the track duration from the header.
+    start_length = START_SILENCE_MAX_END + MIN_SILENCE
+    starts, ends, duration = run_silencedetect(silencedetect_cmd(path, length=start_length))
+
+    # Ending: early enough to contain the start of any silence (≤ MAX_SILENCE_TO_TRIM)
+    # that reaches past END_SECTION_RATIO of the track, which also covers the last SAFE_END_LIMIT seconds
+    end_seek = duration * END_SECTION_RATIO - MAX_SILENCE_TO_TRIM - MIN_SILENCE if duration else 0
+    if end_seek <= start_length:
+        # Short track (or unknown duration): the two sections would overlap, so the whole track is needed.
+        # The beginning is already scanned: the rest starts MIN_SILENCE before its end, so a silence
+        # running across the cut is long enough to be reported by both passes, and is merged back into one.
+        rest_seek = start_length - MIN_SILENCE
+        rest_starts, rest_ends, _ = run_silencedetect(silencedetect_cmd(path, seek=rest_seek))
+
+        # Silences of the beginning that start before rest_seek (one still running at the cut has no end: None)
+        pairs = [(s, e) for s, e in zip(starts, ends + [None]) if s < rest_seek]
+        rest = [(round(s + rest_seek, 6), round(e + rest_seek, 6)) for s, e in zip(rest_starts, rest_ends)]
+        if pairs and rest and rest[0][0] <= (pairs[-1][1] or start_length):
+            # The two passes overlap on this silence: it's the same one
+            pairs[-1] = (pairs[-1][0], rest.pop(0)[1])
+        # Like with a full scan, a silence that never ends has no complete start/end pair
+        pairs = [(s, e) for s, e in pairs if e is not None] + rest
+        return [s for s, _ in pairs], [e for _, e in pairs], duration
+
+    end_starts, end_ends, _ = run_silencedetect(silencedetect_cmd(path, seek=end_seek))
+
+    # Keep only complete start/end pairs of each section, and move the ending's
+    # timestamps (which restart at 0 after seeking) back to the track's timeline
+    pairs = list(zip(starts, ends)) + [(round(s + end_seek, 6), round(e + end_seek, 6))
+                                       for s, e in zip(end_starts, end_ends)]
+    return [s for s, _ in pairs], [e for _, e in pairs], duration
+
+
+# Leading/trailing silence removal in one pass (used when USE_SILENCEREMOVE is on)
+SILENCEREMOVE_FILTER = f"silenceremove=start_periods=1:start_threshold={NOISE_LEVEL}dB:detection=peak"
+SILENCEREMOVE_CHAIN = ",".join([SILENCEREMOVE_FILTER, "areverse", SILENCEREMOVE_FILTER, "areverse"])
+
+
+def remove_silence_single_pass(path, rel_path):
+    '''Trims the leading and trailing silence of a file with a single ffmpeg run (no detection pass)'''
+    messages = [f"\nTrimming (single pass): {rel_path}"]
+
+    # Prepare output
+    out_path = os.path.join(DEST_OUT_FOLDER, rel_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    cmd = [
+        *FFMPEG_BASE, "-y",
+        "-i", path,
+        "-af", SILENCEREMOVE_CHAIN,
+        out_path
+    ]
+
+    try:
+        subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, **SPAWN_KW)
+        return "\n".join(messages), f"[SILENCE REMOVED] {rel_path}\n"
+
+    except (OSError, subprocess.CalledProcessError) as e:
+        messages.append(f"      Failed to trim {rel_path}: {e}")
+        return "\n".join(messages), f"[TRIM FAILED] {rel_path}\n"
+
+
+def process_file(path, rel_path, cached=None):
+    '''Detects and trims the silence of a single audio file.
+
+    Runs inside a worker process, so nothing is written to the log file or the cache here:
+    the function returns (console_output, log_record, detection) and the main process prints/writes them.
+    cached is the (starts, ends, duration) stored by a previous run, or None if ffmpeg must analyze the file;
+    detection is the newly computed (starts, ends, duration), or None if nothing new should be cached.'''
+    if USE_SILENCEREMOVE:
+        output, record = remove_silence_single_pass(path, rel_path)
+        return output, record, None
+
+    messages = [f"\nAnalyzing: {rel_path}"]
+    detection = None
+
+    if cached is not None:
+        # The file didn't change since the previous run: reuse its silences, no ffmpeg run needed
+        starts, ends, duration = cached
+        messages.append("  (silence detection results read from the cache)")
+    else:
+        try:
+            # Run ffmpeg process for silence detection and collect the silences it reports
+            starts, ends, duration = detection = detect_silences(path)
+        except Exception as e:
+            # Except any errors that may have occured while running ffmpeg process
+            messages.append(f"Error analyzing {os.path.basename(path)}: {e}")
+            return "\n".join(messages), "", None
+
+    if not starts or not ends:
+        messages.append(" No silence detected")
+        return "\n".join(messages), f"[NO SILENCE] {rel_path}\n", detection
+
+    # Pair up and filter silences (a single pass, straight into the filtered lists)
+    filtered_starts = []
+    filtered_ends = []
+    for s, e in zip(starts, ends):
+        if MIN_TRIM_SILENCE <= (e - s) <= MAX_SILENCE_TO_TRIM:
+            filtered_starts.append(s)
+            filtered_ends.append(e)
+
+    if not filtered_starts:
+        messages.append("  All detected silences ignored (too short or too long)")
+        return "\n".join(messages), f"[IGNORED SILENCE] {rel_path}\n", detection
+
+    starts = filtered_starts
+    ends = filtered_ends
+
+    messages.append(f"  → Detected {len(starts)} significant silences (≥ {MIN_TRIM_SILENCE}s)")
+
+    # Determine safe trim points
+    start_trim = 0.0
+    end_trim = None
+
+    # ------------------------------------------------------------
+    # SILENCE VALIDATION LOGIC
+    # ------------------------------------------------------------
+    # We only trim silence at:
+    #   - The very beginning (SAFE_START_LIMIT window)
+    #   - The very end (SAFE_END_LIMIT or 85%+ of track length)
+    #
+    # This ensures that musical silence or artistic pauses
+    # in the *middle* of the track are never trimmed.
+    # ------------------------------------------------------------
+
+    # Check silence at start
+    if starts[0] < SAFE_START_LIMIT and ends[0] < START_SILENCE_MAX_END:
+        start_trim = ends[0]
+        messages.append(f"  Safe to trim start up to {start_trim:.2f}s")
+
+    # Check silence at end
+    # (the track duration was read from the header ffmpeg printed during silence detection)
+    if duration:
+        last_silence_start = starts[-1]
+        last_silence_end = ends[-1]
+        silence_len = last_silence_end - last_silence_start
+
+        # How close to the end the silence starts
+        distance_to_end = duration - last_silence_start
+
+        # Case A: Silence is very close to the end (within SAFE_END_LIMIT)
+        if distance_to_end <= SAFE_END_LIMIT:
+            end_trim = last_silence_start
+            messages.append(f"  Safe to trim end (starts {distance_to_end:.2f}s before end, len={silence_len:.2f}s)")
+
+        # Case B: Silence covers big part of the ending
+        elif silence_len >= MIN_TRIM_SILENCE and last_silence_end >= (duration * END_SECTION_RATIO):
+            end_trim = last_silence_start
+            messages.append(f"  Trimming extended silence in final section "
+                            f"(starts at {last_silence_start:.2f}s, len={silence_len:.2f}s, track={duration:.2f}s)")
+
+    # Prepare output
+    out_path = os.path.join(DEST_OUT_FOLDER, rel_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    # Check if trimming is required
+    if start_trim == 0.0 and end_trim is None:
+        messages.append("  Keeping original (no safe trim needed)")
+        return "\n".join(messages), f"[KEEP ORIGINAL] {rel_path}\n", detection
+
+    # Build the trim command
+    cmd_trim = [*FFMPEG_BASE, "-y"]
+
+    # Appending the trim start point
+    if start_trim > 0:
+        cmd_trim += ["-ss", str(start_trim)]
+    cmd_trim += ["-i", path]
+
+    # Appending the trim end point
+    if end_trim:
+        if start_trim > 0:
+            duration_out = end_trim - start_trim
+            if duration_out <= 0:
+                messages.append(f"  Skipping (negative duration {duration_out:.2f}s)")
+                return "\n".join(messages), f"[SKIPPED - BAD DURATION] {rel_path}\n", detection
+            cmd_trim += ["-t", f"{duration_out:.2f}"]
+        else:
+            cmd_trim += ["-to", str(end_trim)]
+
+    # Appending the outputting location
+    cmd_trim += [out_path]
+
+    messages.append("     Running safe trim: " + " ".join(shlex.quote(c) for c in cmd_trim))
+
+    try:
+        # Run the ffmpeg process for trimming audio file
+        subprocess.run(cmd_trim, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, **SPAWN_KW)
+        return "\n".join(messages), f"[TRIMMED] {rel_path} (start={start_trim:.2f}, end={end_trim})\n", detection
+
+    except (OSError, subprocess.CalledProcessError) as e:
+        # Excepting error in the ffmpeg process while trimming
+        # (OSError: ffmpeg could not be started, the first ffmpeg run of a file whose silences were cached)
+        messages.append(f"      Failed to trim {rel_path}: {e}")
+        return "\n".join(messages), f"[TRIM FAILED] {rel_path}\n", detection
+
+
+def walk_audio(root):
+    '''Yields (path, rel_path) for every audio file under root.
+
+    Uses os.scandir directly: the directory entries already know whether they are folders,
+    files are filtered by extension before any path work, and rel_path is a plain string slice.'''
+    root_len = len(os.path.join(root, ""))  # length of root plus its trailing separator
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTS:
+                    yield entry.path, entry.path[root_len:]
+
+
+if __name__ == "__main__":
+    # --- Collect the audio files to analyze ---
+    paths = []
+    rel_paths = []
+    for path, rel_path in walk_audio(INPUT_ROOT_FOLDER):
+        paths.append(path)
+        rel_paths.append(rel_path)
+
+    # --- Prepare log file and cache ---
+    with open(LOG_FILE, "w", encoding="utf-8", buffering=1 << 20) as log, \
+            (shelve.open(CACHE_FILE) if USE_CACHE else contextlib.nullcontext({})) as cache:
+        log.write("Enhanced silence detection and safe trimming results\n")
+        log.write("====================================================\n\n")
+
+        # Look up the silences detected by a previous run (only the main process touches the cache)
+        keys = [cache_key(path) for path in paths] if USE_CACHE else [None] * len(paths)
+        cached = [cache.get(key) for key in keys]
+
+        # Each file is handled by its own worker process (and its own ffmpeg subprocess).
+        # Results come back in the original file order, so the log stays sorted,
+        # and only this main process writes to the log file.
+        log_records = []
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(process_file, paths, rel_paths, cached, chunksize=4)
+            for key, (output, record, detection) in zip(keys, results):
+                print(output)
+                log_records.append(record)
+                if len(log_records) >= LOG_FLUSH_EVERY:
+                    log.write("".join(log_records))
+                    log_records.clear()
+                if detection is not None and key is not None:
+                    cache[key] = detection
+        log.write("".join(log_records))
 
     print(f"\n Done! Log saved to {LOG_FILE}")
 
@@ -321,4 +584,5 @@ with open(LOG_FILE, "w", encoding="utf-8") as log:
 # [IGNORED SILENCE] — detected silences didn’t meet trim rules
 # [KEEP ORIGINAL] — silence detected but trimming not applied
 # [TRIMMED] — file successfully trimmed
+# [SILENCE REMOVED] — file trimmed by the single pass mode (USE_SILENCEREMOVE)
 # [TRIM FAILED] — ffmpeg trim command failed
@@ -1,50 +1,327 @@
 import subprocess
 import re
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np  # optional, only needed by the NumPy scanner (USE_NUMPY_SCANNER)
+except ImportError:
+    np = None
+
+try:
+    import soundfile as sf  # optional, reads WAV/FLAC files without ffmpeg (NATIVE_EXTS)
+except ImportError:
+    sf = None
+
+try:
+    from numba import njit  # optional, compiles the RMS scan to machine code
+except ImportError:
+    njit = None
 
 # --- Configuration ---
 ROOT_FOLDER = r"D:\music all\music"  # root folder to scan recursively
 NOISE_LEVEL = -50   # dB threshold (more negative = more sensitive)
 MIN_SILENCE = 3.0   # seconds of silence to count
 LOG_FILE = "detect_log_silence_log.txt"
+MAX_WORKERS = os.cpu_count()  # number of files analyzed in parallel (each worker runs its own ffmpeg process)
+AUDIO_EXTS = frozenset({".mp3", ".wav", ".flac", ".m4a"})  # audio file extensions to analyze
+LOG_FLUSH_EVERY = 100  # log records are collected and written to the log file in one go every this many files
+
+# --- NumPy scanner (optional, requires: pip install numpy) ---
+USE_NUMPY_SCANNER = False  # True = ffmpeg only decodes, the silence is measured in NumPy
+SCAN_SAMPLE_RATE = 8000    # 8 kHz mono is plenty to tell silence from sound
+SCAN_WINDOW = 0.1          # seconds of audio per RMS measurement
+'''
+The NumPy scanner asks ffmpeg for nothing but a raw 8 kHz mono decode (no filter graph, no silencedetect)
+and measures the loudness of every SCAN_WINDOW in one vectorized NumPy pass.
+A window is silent when its RMS level is below NOISE_LEVEL; MIN_SILENCE seconds of silent windows make a segment.
+
+This is slightly more tolerant than silencedetect, which requires every single sample to stay below NOISE_LEVEL,
+so a few more segments may be reported for noisy recordings.
+'''
+SILENCE_THRESHOLD = 10 ** (NOISE_LEVEL / 20) * 32768  # NOISE_LEVEL (dBFS) as a 16-bit sample amplitude
+NATIVE_EXTS = frozenset({".wav", ".flac"})  # read directly with soundfile (pip install soundfile), no ffmpeg process
+NATIVE_BLOCK_WINDOWS = 100  # SCAN_WINDOWs read from the file at a time (100 = 10 seconds of audio per block)
+'''
+With soundfile installed, the NumPy scanner reads WAV and FLAC files itself (libsndfile) at their own sample rate
+instead of starting ffmpeg, so no process is spawned and no codec or filter graph is set up for these files.
+MP3 and M4A files are still decoded by ffmpeg. With numba installed (pip install numba) the RMS scan
+runs as compiled machine code instead of NumPy array operations.
+'''
+
+# --- Batch mode (one ffmpeg process for many files) ---
+CONCAT_BATCH_SIZE = 0  # 0/1 = one ffmpeg process per file; e.g. 50 = one ffmpeg per 50 files of the same type
+'''
+In batch mode the files are chained with ffmpeg's concat demuxer, so ffmpeg is started (libraries loaded,
+codecs registered) once per batch instead of once per file, which matters most on Windows and for short files.
+Every batch only contains files with the same extension, because concat expects similar streams.
+
+ffmpeg announces every file it opens ("Opening '...' for reading"), and each silence is counted for the
+file opened last. A silence touching the boundary between two files may be merged with the neighbouring
+file's silence or counted for the next file, so keep this off when exact per-file results matter.
+If ffmpeg stops on a broken file, the rest of the batch is analyzed one file at a time.
+'''
+
+# Start of every ffmpeg command: one thread per ffmpeg process, the parallelism comes from the
+# worker processes (MAX_WORKERS), so the files never compete with each other's decoding threads.
+# The input is probed with 200 KB / 0.2 s instead of the default 5 MB / 5 s (plenty for audio-only files),
+# and subtitle/data streams are ignored.
+FFMPEG_BASE = [
+    "ffmpeg", "-hide_banner", "-nostats", "-threads", "1",
+    "-probesize", "200000", "-analyzeduration", "200000",
+    "-sn", "-dn",
+]
+
+# Extra arguments for every ffmpeg process: on Windows no console window is created for it
+SPAWN_KW = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {}
 
 # --- Regex to capture silencedetect output ---
 silence_re = re.compile(r"silence_start")
+opening_re = re.compile(r"Opening '(.*)' for reading")
+
+
+def count_silences_ffmpeg(path):
+    '''Runs ffmpeg silencedetect on a file and returns the number of silent segments'''
+    # Run ffmpeg silencedetect
+    cmd = [
+        *FFMPEG_BASE,
+        "-vn",  # ignore video streams (embedded cover art) so they are never decoded
+        "-i", path,
+        "-af", f"silencedetect=noise={NOISE_LEVEL}dB:d={MIN_SILENCE}",
+        "-c:a", "pcm_s16le",  # cheapest raw codec for the discarded output
+        "-f", "null", "-"
+    ]
+
+    # The output is counted line by line while ffmpeg runs, instead of being buffered as a whole
+    matches = 0
+    # stdin=DEVNULL: ffmpeg never waits for keypresses on the console
+    with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                          text=True, errors="replace", bufsize=1, **SPAWN_KW) as process:
+        for line in process.stderr:
+            if silence_re.search(line):
+                matches += 1
+    return matches
+
+
+def decode_pcm(path):
+    '''Decodes a file to raw 16-bit mono PCM at SCAN_SAMPLE_RATE and returns it as a NumPy array'''
+    cmd = [
+        *FFMPEG_BASE, "-loglevel", "error",
+        "-vn",
+        "-i", path,
+        "-ac", "1", "-ar", str(SCAN_SAMPLE_RATE),
+        "-f", "s16le", "-"
+    ]
+    # 8 kHz mono is 16 KB per second of audio, so even long tracks fit comfortably in memory
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            check=True, **SPAWN_KW)
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def silent_windows(samples, window):
+    '''Returns one boolean per window of `window` samples: True where the RMS level is below NOISE_LEVEL'''
+    n = samples.size // window
+    frames = samples[:n * window].reshape(n, window).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return rms < SILENCE_THRESHOLD
+
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def find_silence(samples, window, threshold):
+        '''Compiled version of silent_windows: True for every window whose RMS level is below threshold'''
+        # No parallel=True: the files are already analyzed by MAX_WORKERS processes
+        n = samples.size // window
+        out = np.empty(n, np.bool_)
+        limit = threshold * threshold * window  # compare the sum of squares, no sqrt/division per window
+        for i in range(n):
+            total = 0.0
+            for j in range(i * window, (i + 1) * window):
+                v = float(samples[j])
+                total += v * v
+            out[i] = total < limit
+        return out
+
+
+def count_silent_runs(silent, window_seconds):
+    '''Counts the runs of silent windows lasting at least MIN_SILENCE seconds'''
+    # +1 where a silent run starts, -1 where it ends (padding closes runs touching the edges)
+    edges = np.diff(np.concatenate(([0], silent.view(np.int8), [0])))
+    run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    return int(np.count_nonzero(run_lengths * window_seconds >= MIN_SILENCE))
+
+
+def count_silences_numpy(path):
+    '''Decodes a file with ffmpeg and returns the number of silent segments measured in NumPy'''
+    window = int(SCAN_SAMPLE_RATE * SCAN_WINDOW)
+    return count_silent_runs(silent_windows(decode_pcm(path), window), SCAN_WINDOW)
+
+
+def count_silences_native(path):
+    '''Reads a WAV/FLAC file with soundfile and returns the number of silent segments (no ffmpeg involved).
+
+    The file is read in blocks of NATIVE_BLOCK_WINDOWS windows, so only one block of samples is in memory
+    at a time (not the whole track at its native rate). Only the silent/not silent flag of every window
+    is kept across the blocks (1 byte per SCAN_WINDOW), the runs are counted over all of them at the end.'''
+    window = int(sf.info(path).samplerate * SCAN_WINDOW)
+    flags = []
+    # Every block is a whole number of windows, so no window is split between two blocks
+    for data in sf.blocks(path, blocksize=window * NATIVE_BLOCK_WINDOWS, dtype="int16", always_2d=True):
+        # Mono mix of all channels (a single channel is used as it is)
+        samples = data[:, 0] if data.shape[1] == 1 else data.mean(axis=1, dtype=np.float32)
+        if njit is not None:
+            flags.append(find_silence(samples, window, SILENCE_THRESHOLD))
+        else:
+            flags.append(silent_windows(samples, window))
+    silent = np.concatenate(flags) if flags else np.zeros(0, np.bool_)
+    return count_silent_runs(silent, SCAN_WINDOW)
+
+
+def count_silences_concat(paths):
+    '''Runs ONE ffmpeg silencedetect over a batch of files (concat demuxer).
+
+    Returns the number of silent segments of every file, None for the files ffmpeg didn't finish.'''
+    counts = [None] * len(paths)
+    current = -1
 
-# --- Prepare log file ---
-with open(LOG_FILE, "w", encoding="utf-8") as log:
-    log.write("Silence detection results\n")
-    log.write("=========================\n\n")
-
-    # Walk recursively through all folders
-    for root, _, files in os.walk(ROOT_FOLDER):
-        for fname in files:
-            if not fname.lower().endswith((".mp3", ".wav", ".flac", ".m4a")):
-                continue
-
-            path = os.path.join(root, fname)
-            print(f"Analyzing: {path}")
-
-            # Run ffmpeg silencedetect
-            cmd = [
-                "ffmpeg", "-hide_banner", "-nostats",
-                "-i", path,
-                "-af", f"silencedetect=noise={NOISE_LEVEL}dB:d={MIN_SILENCE}",
-                "-f", "null", "-"
-            ]
-
-            try:
-                result = subprocess.run(cmd, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
-            except Exception as e:
-                print(f" Error analyzing {fname}: {e}")
-                continue
-
-            matches = silence_re.findall(result.stderr)
-
-            if matches:
-                print(f"  → SILENCE FOUND ({len(matches)} segments)")
-                log.write(f"[SILENCE FOUND] {path}\n")
+    # Write the concat list (single quotes inside a path are escaped as '\'')
+    list_fd, list_path = tempfile.mkstemp(suffix=".txt", text=True)
+    try:
+        with os.fdopen(list_fd, "w", encoding="utf-8") as list_file:
+            for path in paths:
+                list_file.write("file '" + path.replace("'", "'\\''") + "'\n")
+
+        cmd = [
+            *FFMPEG_BASE,
+            "-vn",
+            "-f", "concat", "-safe", "0",  # -safe 0 allows absolute paths in the list
+            "-i", list_path,
+            "-af", f"silencedetect=noise={NOISE_LEVEL}dB:d={MIN_SILENCE}",
+            "-c:a", "pcm_s16le",
+            "-f", "null", "-"
+        ]
+
+        with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                              text=True, errors="replace", bufsize=1, **SPAWN_KW) as process:
+            for line in process.stderr:
+                m = opening_re.search(line)
+                if m and m[1] != list_path:
+                    # ffmpeg moved on to the next file of the list
+                    current += 1
+                    if current < len(paths):
+                        counts[current] = 0
+                elif 0 <= current < len(paths) and silence_re.search(line):
+                    counts[current] += 1
+
+        if process.returncode != 0 and 0 <= current < len(paths):
+            # ffmpeg stopped while reading this file, its count is incomplete
+            counts[current] = None
+    finally:
+        os.remove(list_path)
+
+    return counts
+
+
+def report(path, matches):
+    '''Formats the (console_output, log_record) of a file from its number of silent segments'''
+    messages = [f"Analyzing: {path}"]
+
+    if matches:
+        messages.append(f"  → SILENCE FOUND ({matches} segments)")
+        return "\n".join(messages), f"[SILENCE FOUND] {path}\n"
+
+    messages.append(f"  → No silence detected")
+    return "\n".join(messages), ""
+
+
+def process_file(path):
+    '''Detects the silent segments of a single file.
+
+    Runs inside a worker process and returns (console_output, log_record);
+    only the main process writes to the log file.'''
+    try:
+        if USE_NUMPY_SCANNER and np is not None:
+            if sf is not None and os.path.splitext(path)[1].lower() in NATIVE_EXTS:
+                matches = count_silences_native(path)
             else:
-                print(f"  → No silence detected")
+                matches = count_silences_numpy(path)
+        else:
+            matches = count_silences_ffmpeg(path)
+    except Exception as e:
+        return f"Analyzing: {path}\n Error analyzing {os.path.basename(path)}: {e}", ""
+
+    return report(path, matches)
+
+
+def process_batch(paths):
+    '''Detects the silent segments of a batch of files, returns a (console_output, log_record) per file'''
+    if len(paths) == 1:
+        return [process_file(paths[0])]
+
+    try:
+        counts = count_silences_concat(paths)
+    except Exception:
+        counts = [None] * len(paths)
+
+    # The files the batch didn't finish are analyzed one by one
+    return [report(path, count) if count is not None else process_file(path)
+            for path, count in zip(paths, counts)]
+
+
+def make_batches(paths):
+    '''Groups the files into batches of CONCAT_BATCH_SIZE files with the same extension
+    (batches of a single file when the batch mode is off)'''
+    if CONCAT_BATCH_SIZE <= 1 or (USE_NUMPY_SCANNER and np is not None):
+        return [[path] for path in paths]
+
+    by_ext = {}
+    for path in paths:
+        by_ext.setdefault(os.path.splitext(path)[1].lower(), []).append(path)
+    return [group[i:i + CONCAT_BATCH_SIZE]
+            for group in by_ext.values()
+            for i in range(0, len(group), CONCAT_BATCH_SIZE)]
+
+
+def walk_audio(root):
+    '''Yields (path, rel_path) for every audio file under root.
+
+    Uses os.scandir directly: the directory entries already know whether they are folders,
+    files are filtered by extension before any path work, and rel_path is a plain string slice.'''
+    root_len = len(os.path.join(root, ""))  # length of root plus its trailing separator
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTS:
+                    yield entry.path, entry.path[root_len:]
+
+
+if __name__ == "__main__":
+    # Walk recursively through all folders and collect the audio files
+    paths = [path for path, _ in walk_audio(ROOT_FOLDER)]
+
+    if USE_NUMPY_SCANNER and np is None:
+        print("NumPy is not installed (pip install numpy), using ffmpeg silencedetect instead.\n")
+
+    # --- Prepare log file ---
+    with open(LOG_FILE, "w", encoding="utf-8", buffering=1 << 20) as log:
+        log.write("Silence detection results\n")
+        log.write("=========================\n\n")
+
+        # The batches are analyzed in parallel, the results come back in the original order
+        batches = make_batches(paths)
+        log_records = []
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for results in executor.map(process_batch, batches, chunksize=4 if CONCAT_BATCH_SIZE <= 1 else 1):
+                for output, record in results:
+                    print(output)
+                    log_records.append(record)
+                if len(log_records) >= LOG_FLUSH_EVERY:
+                    log.write("".join(log_records))
+                    log_records.clear()
+        log.write("".join(log_records))
 
     print(f"\nDone! Results saved to {os.path.abspath(LOG_FILE)}")